@@ -19,6 +19,10 @@ class Config:
 
     # Настройки системы
     MAX_TEXT_LENGTH = 5000  # Максимальная длина текста для перевода
+    TRANSLATION_CACHE_MAX = 256  # Максимальное число переводов в кэше
+    TRANSLATION_CONCURRENCY = 4  # Число параллельных запросов при пакетном переводе
+    TRANSLATION_RATE_LIMIT = 2  # Максимум запросов к API в секунду при пакетном переводе
+    TRANSLATION_GROUP_MAX_LENGTH = 2000  # Суммарная длина коротких текстов в одном групповом запросе
     SUPPORTED_LANGUAGES = {
         'en-ru': {'source': 'английский', 'target': 'русский'},
         'en-de': {'source': 'английский', 'target': 'немецкий'},
@@ -30,6 +34,7 @@ class Config:
     DATA_DIR = os.path.join(BASE_DIR, 'data')
     DICTIONARIES_DIR = os.path.join(DATA_DIR, 'dictionaries')
     LOGS_DIR = os.path.join(BASE_DIR, 'logs')
+    TRANSLATION_CACHE_DB = os.path.join(DATA_DIR, 'translation_cache.db')
 
     # Предметные области
     DOMAINS = {
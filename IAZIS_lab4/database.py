@@ -684,6 +684,111 @@ class DatabaseManager:
         self.close()
 
 
+class TranslationCacheStore:
+    """Постоянный кэш переводов в SQLite (общий для процессов и перезапусков)"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Инициализация хранилища кэша
+
+        Args:
+            db_path: Путь к файлу базы данных кэша
+        """
+        self.db_path = db_path or Config.TRANSLATION_CACHE_DB
+        self._local = threading.local()  # Для хранения соединений по потокам
+        self._init_database()
+
+    def _init_database(self):
+        """Создает таблицу кэша"""
+        try:
+            conn = self.get_connection()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    key BLOB PRIMARY KEY,
+                    lang TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    translated TEXT NOT NULL
+                )
+            ''')
+            conn.commit()
+            logger.info(f"Кэш переводов инициализирован: {self.db_path}")
+
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при инициализации кэша переводов: {e}")
+            raise
+
+    def get_connection(self):
+        """Получает соединение с базой данных кэша для текущего потока"""
+        if not hasattr(self._local, 'connection'):
+            conn = sqlite3.connect(self.db_path)
+            # WAL позволяет читать кэш параллельно с записью из других процессов
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = conn
+        return self._local.connection
+
+    def get(self, key: bytes) -> Optional[str]:
+        """
+        Получает перевод из кэша
+
+        Args:
+            key: Ключ кэша (дайджест текста и пары языков)
+
+        Returns:
+            Переведенный текст или None, если не найден
+        """
+        try:
+            row = self.get_connection().execute(
+                'SELECT translated FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            return row[0] if row else None
+
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при чтении кэша переводов: {e}")
+            return None
+
+    def put(self, key: bytes, lang_pair: str, translated_text: str) -> bool:
+        """
+        Сохраняет перевод в кэш
+
+        Args:
+            key: Ключ кэша (дайджест текста и пары языков)
+            lang_pair: Пара языков
+            translated_text: Переведенный текст
+
+        Returns:
+            True если сохранено успешно, иначе False
+        """
+        try:
+            conn = self.get_connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, lang, ts, translated) VALUES (?, ?, ?, ?)',
+                (key, lang_pair, int(datetime.now().timestamp()), translated_text)
+            )
+            conn.commit()
+            return True
+
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при записи в кэш переводов: {e}")
+            return False
+
+    def clear(self):
+        """Очищает кэш переводов"""
+        try:
+            conn = self.get_connection()
+            conn.execute('DELETE FROM cache')
+            conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при очистке кэша переводов: {e}")
+
+    def close(self):
+        """Закрывает соединение с базой данных кэша для текущего потока"""
+        if hasattr(self._local, 'connection') and self._local.connection:
+            self._local.connection.close()
+            del self._local.connection
+
+
 # Создаем синглтон экземпляр базы данных для удобства использования
 _db_instance = None
 
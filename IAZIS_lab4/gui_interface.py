@@ -372,7 +372,7 @@ class TranslationApp:
 
                 # Обрабатываем текст
                 processed = self.processor.preprocess_text(source_text)
-                frequency_list = self.processor.calculate_word_frequencies(source_text)
+                frequency_list = self.processor.calculate_word_frequencies_from(processed['tokens'])
                 self.current_frequency_list = frequency_list
 
                 # Обновляем интерфейс в главном потоке
@@ -499,6 +499,8 @@ class TranslationApp:
         if 'phrases' in result:
             phrases = result['phrases']
             for phrase_type, phrase_list in phrases.items():
+                if not phrase_list:
+                    continue
                 self.phrases_text.insert(tk.END, f"{phrase_type}:\n")
                 for phrase in phrase_list:
                     self.phrases_text.insert(tk.END, f"  - {phrase}\n")
@@ -16,6 +16,7 @@ from translation_module import TranslationModule
 from text_processor import TextProcessor
 from database import get_database
 from gui_interface import TranslationApp
+from utils import setup_logging
 
 
 
@@ -144,6 +145,8 @@ def show_system_info():
 
 def main():
     """Основная функция запуска системы"""
+    setup_logging()
+
     parser = argparse.ArgumentParser(
         description='Система машинного перевода текстов',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -4,10 +4,11 @@
 
 import re
 import string
-from typing import List, Dict, Tuple, Any, Optional
-from collections import Counter, defaultdict
+from itertools import islice
+from typing import List, Dict, Tuple, Any, Optional, Iterable
+from collections import Counter
 import nltk
-from nltk import pos_tag, word_tokenize
+from nltk import pos_tag, pos_tag_sents, word_tokenize
 from nltk.tree import Tree
 from nltk.chunk import conlltags2tree, tree2conlltags
 import nltk.data
@@ -15,32 +16,63 @@ import nltk.data
 from config import Config
 from utils import logger, clean_text
 
+# Множество знаков препинания для быстрой проверки принадлежности
+_PUNCT_SET = frozenset(string.punctuation)
+
+# Регулярные выражения для простой разбивки текста (запасной вариант)
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Простой текст: ASCII-слова, после которых могут стоять только знаки [,;:!?],
+# точка допускается лишь в самом конце текста. Точки внутри текста исключены:
+# word_tokenize оставляет их при слове или отделяет в зависимости от Punkt,
+# а многоточие сохраняет отдельным токеном.
+_IS_SIMPLE_RE = re.compile(r'^\s*(?:[A-Za-z0-9]+[,;:!?]*\s+)*[A-Za-z0-9]+[,;:!?]*\.?\s*$')
+# Слова, которые правила Treebank разбивают на части (can|not, gon|na, ...)
+_TREEBANK_SPLIT_WORDS_RE = re.compile(r'\b(?:cannot|gimme|gonna|gotta|lemme|wanna)\b', re.IGNORECASE)
+_SIMPLE_TEXT_MAX_LENGTH = 1000
+
+# Метки фраз, извлекаемых из дерева разбора
+_PHRASE_LABELS_ORDER = ('NP', 'VP', 'PP')
+_PHRASE_LABELS = frozenset(_PHRASE_LABELS_ORDER)
+
+# Флаг: ресурсы NLTK уже проверены в этом процессе
+_RESOURCES_READY = False
+
+
+def _ensure_nltk_resources():
+    """Загружает необходимые ресурсы NLTK (один раз за процесс)"""
+    global _RESOURCES_READY
+    if _RESOURCES_READY:
+        return
+
+    required_resources = [
+        'punkt',
+        'averaged_perceptron_tagger',
+        'maxent_ne_chunker',
+        'words'
+    ]
+
+    for resource in required_resources:
+        try:
+            nltk.data.find(f'tokenizers/{resource}' if resource == 'punkt' else f'taggers/{resource}'
+            if resource == 'averaged_perceptron_tagger' else f'chunkers/{resource}'
+            if resource == 'maxent_ne_chunker' else f'corpora/{resource}')
+        except LookupError:
+            print(f"Загрузка ресурса NLTK: {resource}...")
+            nltk.download(resource, quiet=True)
+
+    _RESOURCES_READY = True
+
 
 class TextProcessor:
     """Класс для обработки текста и грамматического анализа"""
 
     def __init__(self):
         """Инициализация обработчика текста"""
-        self._download_nltk_resources()
+        _ensure_nltk_resources()
         self._initialize_grammar_tags()
-
-    def _download_nltk_resources(self):
-        """Загружает необходимые ресурсы NLTK"""
-        required_resources = [
-            'punkt',
-            'averaged_perceptron_tagger',
-            'maxent_ne_chunker',
-            'words'
-        ]
-
-        for resource in required_resources:
-            try:
-                nltk.data.find(f'tokenizers/{resource}' if resource == 'punkt' else f'taggers/{resource}'
-                if resource == 'averaged_perceptron_tagger' else f'chunkers/{resource}'
-                if resource == 'maxent_ne_chunker' else f'corpora/{resource}')
-            except LookupError:
-                print(f"Загрузка ресурса NLTK: {resource}...")
-                nltk.download(resource, quiet=True)
+        self._initialize_chunk_parser()
 
     def _initialize_grammar_tags(self):
         """Инициализация словаря грамматических тегов"""
@@ -98,6 +130,18 @@ class TextProcessor:
             'NPRO': 'местоимение'
         }
 
+    def _initialize_chunk_parser(self):
+        """Создает парсер для синтаксического разбора (один раз на экземпляр)"""
+        # Создаем дерево разбора (упрощенное)
+        # В реальной системе можно использовать более сложные парсеры
+        grammar = r"""
+            NP: {<DT|JJ|NN.*>+}          # Именная группа
+            PP: {<IN><NP>}               # Предложная группа
+            VP: {<VB.*><NP|PP>*}         # Глагольная группа
+        """
+
+        self._chunk_parser = nltk.RegexpParser(grammar)
+
     def preprocess_text(self, text: str) -> Dict[str, Any]:
         """
         Предварительная обработка текста
@@ -140,6 +184,11 @@ class TextProcessor:
         if not text:
             return []
 
+        # Без знаков конца предложения текст - одно предложение, Punkt не нужен
+        if '.' not in text and '!' not in text and '?' not in text:
+            sentence = text.strip()
+            return [sentence] if sentence else []
+
         try:
             # Используем NLTK для английского языка
             sent_detector = nltk.data.load('tokenizers/punkt/english.pickle')
@@ -147,7 +196,7 @@ class TextProcessor:
             return [s.strip() for s in sentences if s.strip()]
         except:
             # Простая разбивка по знакам препинания
-            sentences = re.split(r'(?<=[.!?])\s+', text)
+            sentences = _SENT_SPLIT_RE.split(text)
             return [s.strip() for s in sentences if s.strip()]
 
     def _tokenize_words(self, text: str) -> List[str]:
@@ -155,15 +204,21 @@ class TextProcessor:
         if not text:
             return []
 
+        # Быстрый путь для короткого простого текста: те же токены, что word_tokenize
+        # без пунктуации (см. _IS_SIMPLE_RE и _TREEBANK_SPLIT_WORDS_RE)
+        if (len(text) < _SIMPLE_TEXT_MAX_LENGTH and _IS_SIMPLE_RE.match(text)
+                and not _TREEBANK_SPLIT_WORDS_RE.search(text)):
+            return _WORD_RE.findall(text)
+
         try:
             # Используем NLTK токенизатор
             tokens = word_tokenize(text)
             # Убираем чисто знаки препинания
-            tokens = [token for token in tokens if token not in string.punctuation]
+            tokens = [token for token in tokens if token not in _PUNCT_SET]
             return tokens
         except:
             # Простая токенизация
-            words = re.findall(r'\b\w+\b', text.lower())
+            words = _WORD_RE.findall(text.lower())
             return words
 
     def analyze_grammar(self, text: str) -> Dict[str, Any]:
@@ -188,28 +243,46 @@ class TextProcessor:
             tokens = word_tokenize(text)
             pos_tags_result = pos_tag(tokens)  # ← Изменяем имя переменной
 
-            # Подсчет тегов
-            tag_counts = Counter(tag for word, tag in pos_tags_result)
+            return self.analyze_grammar_from(tokens, pos_tags_result)
 
-            # Создаем подробную информацию о словах
-            word_info = []
-            for word, tag in pos_tags_result:
-                word_info.append({
-                    'word': word,
-                    'pos_tag': tag,
-                    'pos_explanation': self.pos_tags_explanation.get(tag, 'неизвестно'),
-                    'is_punctuation': word in string.punctuation,
-                    'length': len(word)
-                })
+        except Exception as e:
+            logger.error(f"Ошибка при грамматическом анализе: {e}")
+            return {
+                'pos_tags': [],
+                'tag_counts': {},
+                'word_info': [],
+                'error': str(e)
+            }
+
+    def analyze_grammar_batch(self, sentences: List[str]) -> Dict[str, Any]:
+        """
+        Грамматический анализ текста, разбитого на предложения
+
+        Все предложения размечаются одним вызовом pos_tag_sents,
+        поэтому подготовка теггера выполняется один раз.
+
+        Args:
+            sentences: Список предложений
 
+        Returns:
+            Словарь с грамматической информацией (как в analyze_grammar)
+        """
+        if not sentences:
             return {
-                'pos_tags': pos_tags_result,
-                'tag_counts': dict(tag_counts),
-                'word_info': word_info,
-                'total_words': len(tokens),
-                'unique_words': len(set(tokens))
+                'pos_tags': [],
+                'tag_counts': {},
+                'word_info': []
             }
 
+        try:
+            tokenized = [word_tokenize(s) for s in sentences]
+            tagged = pos_tag_sents(tokenized)
+
+            tokens = [t for sent in tokenized for t in sent]
+            pos_tags_result = [t for sent in tagged for t in sent]
+
+            return self.analyze_grammar_from(tokens, pos_tags_result)
+
         except Exception as e:
             logger.error(f"Ошибка при грамматическом анализе: {e}")
             return {
@@ -219,13 +292,51 @@ class TextProcessor:
                 'error': str(e)
             }
 
+    def analyze_grammar_from(self, tokens: List[str],
+                             pos_tags_result: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Грамматический анализ по уже токенизированному и размеченному тексту
+
+        Args:
+            tokens: Токены текста
+            pos_tags_result: POS-теги токенов
+
+        Returns:
+            Словарь с грамматической информацией
+        """
+        # Подсчет тегов
+        tag_counts = Counter(tag for word, tag in pos_tags_result)
+
+        # Создаем подробную информацию о словах
+        get_explanation = self.pos_tags_explanation.get
+        word_info = [
+            {
+                'word': word,
+                'pos_tag': tag,
+                'pos_explanation': get_explanation(tag, 'неизвестно'),
+                'is_punctuation': word in _PUNCT_SET,
+                'length': len(word)
+            }
+            for word, tag in pos_tags_result
+        ]
+
+        return {
+            'pos_tags': pos_tags_result,
+            'tag_counts': dict(tag_counts),
+            'tag_counter': tag_counts,
+            'word_info': word_info,
+            'total_words': len(tokens),
+            'unique_words': len(set(tokens))
+        }
 
-    def calculate_word_frequencies(self, text: str) -> List[Dict[str, Any]]:
+    def calculate_word_frequencies(self, text: str,
+                                   top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Рассчитывает частоту слов в тексте
 
         Args:
             text: Текст для анализа
+            top_k: Количество самых частых слов (None - все слова)
 
         Returns:
             Список словарей с информацией о словах, отсортированный по частоте
@@ -236,22 +347,40 @@ class TextProcessor:
         # Токенизируем текст
         tokens = self._tokenize_words(text)
 
+        return self.calculate_word_frequencies_from(tokens, top_k=top_k)
+
+    def calculate_word_frequencies_from(self, tokens: List[str],
+                                        pos_tags_result: Optional[List[Tuple[str, str]]] = None,
+                                        top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Рассчитывает частоту слов по уже токенизированному тексту
+
+        Args:
+            tokens: Токены текста (без знаков препинания)
+            pos_tags_result: POS-теги токенов; если не переданы, вычисляются
+            top_k: Количество самых частых слов (None - все слова)
+
+        Returns:
+            Список словарей с информацией о словах, отсортированный по частоте
+        """
         if not tokens:
             return []
 
         # Подсчитываем частоту
         frequency = Counter(tokens)
 
-        # Сортируем по убыванию частоты
-        sorted_freq = sorted(frequency.items(), key=lambda x: x[1], reverse=True)
+        # Сортируем по убыванию частоты (при top_k - только нужные слова)
+        sorted_freq = frequency.most_common(top_k)
 
         # Пробуем получить POS-теги
-        try:
-            pos_tags_dict = dict(pos_tag(tokens))
-        except Exception as e:
-            # Если не получается, создаем пустой словарь
-            pos_tags_dict = {}
-            logger.warning(f"Не удалось получить POS-теги: {e}")
+        if pos_tags_result is None:
+            try:
+                pos_tags_result = pos_tag(tokens)
+            except Exception as e:
+                # Если не получается, работаем без тегов
+                pos_tags_result = []
+                logger.warning(f"Не удалось получить POS-теги: {e}")
+        pos_tags_dict = dict(pos_tags_result)
 
         result = []
         for word, count in sorted_freq:
@@ -289,16 +418,8 @@ class TextProcessor:
             tokens = word_tokenize(sentence)
             pos_tags = pos_tag(tokens)
 
-            # Создаем дерево разбора (упрощенное)
-            # В реальной системе можно использовать более сложные парсеры
-            grammar = r"""
-                NP: {<DT|JJ|NN.*>+}          # Именная группа
-                PP: {<IN><NP>}               # Предложная группа
-                VP: {<VB.*><NP|PP>*}         # Глагольная группа
-            """
-
-            chunk_parser = nltk.RegexpParser(grammar)
-            parsed_tree = chunk_parser.parse(pos_tags)
+            # Строим дерево разбора заранее созданным парсером
+            parsed_tree = self._chunk_parser.parse(pos_tags)
 
             # Преобразуем дерево в строку
             tree_str = str(parsed_tree)
@@ -327,6 +448,18 @@ class TextProcessor:
                 'tree_diagram': f"Ошибка разбора: {e}"
             }
 
+    def parse_sentences_syntax(self, sentences: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Синтаксический разбор нескольких предложений
+
+        Args:
+            sentences: Список предложений для разбора
+
+        Returns:
+            Список результатов parse_sentence_syntax в том же порядке
+        """
+        return [self.parse_sentence_syntax(sentence) for sentence in sentences]
+
     def _format_tree_diagram(self, tree) -> str:
         """Форматирует дерево для отображения"""
         if isinstance(tree, str):
@@ -352,29 +485,26 @@ class TextProcessor:
 
     def _extract_phrases(self, tree) -> Dict[str, List[str]]:
         """Извлекает фразы из дерева разбора"""
-        phrases = defaultdict(list)
+        phrases = {label: [] for label in _PHRASE_LABELS_ORDER}
 
-        if isinstance(tree, Tree):
-            if tree.label() in ['NP', 'VP', 'PP']:
-                # Извлекаем слова из фразы
-                words = []
-                for leaf in tree.leaves():
-                    if isinstance(leaf, tuple):
-                        words.append(leaf[0])
-                    else:
-                        words.append(str(leaf))
+        # Обход в глубину без рекурсии, в том же порядке, что и рекурсивный
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, Tree):
+                continue
 
+            label = node.label()
+            if label in _PHRASE_LABELS:
+                # Извлекаем слова из фразы
+                words = [leaf[0] if isinstance(leaf, tuple) else str(leaf)
+                         for leaf in node.leaves()]
                 if words:
-                    phrases[tree.label()].append(" ".join(words))
+                    phrases[label].append(" ".join(words))
 
-            # Рекурсивно обрабатываем дочерние узлы
-            for child in tree:
-                if isinstance(child, Tree):
-                    child_phrases = self._extract_phrases(child)
-                    for label, phrase_list in child_phrases.items():
-                        phrases[label].extend(phrase_list)
+            stack.extend(child for child in reversed(node) if isinstance(child, Tree))
 
-        return dict(phrases)
+        return phrases
 
     def get_word_statistics(self, text: str) -> Dict[str, Any]:
         """
@@ -394,92 +524,109 @@ class TextProcessor:
         if not tokens:
             return {}
 
-        # Подсчитываем различные метрики
-        word_lengths = [len(word) for word in tokens]
+        # Подсчитываем различные метрики за один проход по токенам
+        counter = Counter(tokens)
+        total_length = 0
+        max_length = 0
+        min_length = len(tokens[0])
+        for word in tokens:
+            length = len(word)
+            total_length += length
+            if length > max_length:
+                max_length = length
+            if length < min_length:
+                min_length = length
+
+        total_words = len(tokens)
+        unique_words = len(counter)
 
         return {
-            'total_words': len(tokens),
-            'unique_words': len(set(tokens)),
-            'avg_word_length': sum(word_lengths) / len(word_lengths) if word_lengths else 0,
-            'max_word_length': max(word_lengths) if word_lengths else 0,
-            'min_word_length': min(word_lengths) if word_lengths else 0,
-            'lexical_diversity': len(set(tokens)) / len(tokens) if tokens else 0,
-            'most_common_words': Counter(tokens).most_common(5)
+            'total_words': total_words,
+            'unique_words': unique_words,
+            'avg_word_length': total_length / total_words,
+            'max_word_length': max_length,
+            'min_word_length': min_length,
+            'lexical_diversity': unique_words / total_words,
+            'most_common_words': counter.most_common(5)
         }
 
     def prepare_translation_output(self,
                                    source_text: str,
                                    translated_text: str,
-                                   frequency_list: List[Dict[str, Any]]) -> str:
+                                   frequency_list: Iterable[Dict[str, Any]]) -> str:
         """
         Подготавливает форматированный вывод для сохранения
 
         Args:
             source_text: Исходный текст
             translated_text: Переведенный текст
-            frequency_list: Список частот слов
+            frequency_list: Список (или итератор) частот слов, отсортированный по частоте
 
         Returns:
             Форматированная строка для сохранения
         """
-        output = []
-        output.append("=" * 60)
-        output.append("РЕЗУЛЬТАТЫ ПЕРЕВОДА")
-        output.append("=" * 60)
-        output.append("")
-
-        # Исходный текст
-        output.append("ИСХОДНЫЙ ТЕКСТ:")
-        output.append("-" * 40)
-        output.append(source_text)
-        output.append("")
-
-        # Переведенный текст
-        output.append("ПЕРЕВЕДЕННЫЙ ТЕКСТ:")
-        output.append("-" * 40)
-        output.append(translated_text)
-        output.append("")
-
-        # Статистика
+        # Токены здесь не нужны - только разбиение на предложения
+        source_sentences = self._split_into_sentences(clean_text(source_text))
+
         source_stats = self.get_word_statistics(source_text)
         trans_stats = self.get_word_statistics(translated_text)
+        grammar_info = self.analyze_grammar_batch(source_sentences)
+
+        tag_counter = grammar_info.get('tag_counter', Counter())
+        get_explanation = self.pos_tags_explanation.get
+
+        rows = [
+            "=" * 60,
+            "РЕЗУЛЬТАТЫ ПЕРЕВОДА",
+            "=" * 60,
+            "",
+
+            # Исходный текст
+            "ИСХОДНЫЙ ТЕКСТ:",
+            "-" * 40,
+            source_text,
+            "",
+
+            # Переведенный текст
+            "ПЕРЕВЕДЕННЫЙ ТЕКСТ:",
+            "-" * 40,
+            translated_text,
+            "",
+
+            # Статистика
+            "СТАТИСТИКА:",
+            "-" * 40,
+            f"Исходный текст: {source_stats.get('total_words', 0)} слов, "
+            f"{source_stats.get('unique_words', 0)} уникальных",
+            f"Переведенный текст: {trans_stats.get('total_words', 0)} слов, "
+            f"{trans_stats.get('unique_words', 0)} уникальных",
+            "",
+
+            # Частотный список
+            "ЧАСТОТНЫЙ СПИСОК СЛОВ (топ-20):",
+            "-" * 40,
+            f"{'Слово':<20} {'Частота':<10} {'%':<10} {'Часть речи':<30}",
+            "-" * 70,
+            *[self._format_frequency_row(item) for item in islice(frequency_list, 20)],
+            "",
+
+            # Грамматическая информация
+            "ГРАММАТИЧЕСКАЯ ИНФОРМАЦИЯ:",
+            "-" * 40,
+            *[f"{tag}: {get_explanation(tag, 'неизвестно')} - {count}"
+              for tag, count in tag_counter.most_common()]
+        ]
+
+        return "\n".join(rows)
+
+    @staticmethod
+    def _format_frequency_row(item: Dict[str, Any]) -> str:
+        """Форматирует строку частотного списка"""
+        word = item.get('word', '')
+
+        # Обрезаем слишком длинные слова
+        if len(word) > 18:
+            word = word[:15] + "..."
 
-        output.append("СТАТИСТИКА:")
-        output.append("-" * 40)
-        output.append(f"Исходный текст: {source_stats.get('total_words', 0)} слов, "
-                      f"{source_stats.get('unique_words', 0)} уникальных")
-        output.append(f"Переведенный текст: {trans_stats.get('total_words', 0)} слов, "
-                      f"{trans_stats.get('unique_words', 0)} уникальных")
-        output.append("")
-
-        # Частотный список
-        output.append("ЧАСТОТНЫЙ СПИСОК СЛОВ (топ-20):")
-        output.append("-" * 40)
-        output.append(f"{'Слово':<20} {'Частота':<10} {'%':<10} {'Часть речи':<30}")
-        output.append("-" * 70)
-
-        for i, item in enumerate(frequency_list[:20]):
-            word = item.get('word', '')
-            freq = item.get('frequency', 0)
-            perc = item.get('percentage', 0)
-            pos_exp = item.get('pos_explanation', '')
-
-            # Обрезаем слишком длинные слова
-            if len(word) > 18:
-                word = word[:15] + "..."
-
-            output.append(f"{word:<20} {freq:<10} {perc:<10.2f} {pos_exp:<30}")
-
-        output.append("")
-
-        # Грамматическая информация
-        output.append("ГРАММАТИЧЕСКАЯ ИНФОРМАЦИЯ:")
-        output.append("-" * 40)
-        grammar_info = self.analyze_grammar(source_text)
-        tag_counts = grammar_info.get('tag_counts', {})
-
-        for tag, count in sorted(tag_counts.items(), key=lambda x: x[1], reverse=True):
-            explanation = self.pos_tags_explanation.get(tag, 'неизвестно')
-            output.append(f"{tag}: {explanation} - {count}")
-
-        return "\n".join(output)
\ No newline at end of file
+        return (f"{word:<20} {item.get('frequency', 0):<10} "
+                f"{item.get('percentage', 0):<10.2f} {item.get('pos_explanation', ''):<30}")
\ No newline at end of file
@@ -2,26 +2,210 @@
 Модуль машинного перевода через OpenRouter API
 """
 
+import hashlib
 import json
+import logging
+import re
+import threading
 import time
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, NamedTuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import ijson
+
+    IJSON_SUPPORT = True
+except ImportError:
+    IJSON_SUPPORT = False
+
+try:
+    import ahocorasick
+
+    AHOCORASICK_SUPPORT = True
+except ImportError:
+    AHOCORASICK_SUPPORT = False
 
 from config import Config
-from utils import logger, format_translation_result, validate_text_length
+from database import TranslationCacheStore
+from utils import logger, format_translation_result, validate_text_length, json_dumps, json_loads
+
+# Распространенные префиксы, которые модель добавляет перед переводом
+_PREFIXES_TO_REMOVE = (
+    'Alright, ',
+    'Okay, ',
+    'So, ',
+    'The translation is: ',
+    'Translated text: ',
+    'Here is the translation: ',
+    'Перевод: ',
+    'Вот перевод: '
+)
+
+# Шаблоны строк, которые нужно удалить (рассуждения модели)
+_REASONING_PATTERNS = (
+    'alright', 'let\'s', 'first', 'i need', 'the key terms',
+    'now', 'putting it', 'final check', 'so the final',
+    'давайте', 'сначала', 'ключевые термины',
+    'теперь', 'собирая все вместе', 'итоговый перевод'
+)
+
+# Начала строк, похожих на команды или междометия
+_BAD_STARTS = ('wait', 'hmm', 'um', 'well')
+
+_PREFIX_RE = re.compile('^(?:' + '|'.join(map(re.escape, _PREFIXES_TO_REMOVE)) + ')+')
+_REASONING_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, _REASONING_PATTERNS)) + r')\b')
+_BAD_START_RE = re.compile(r'(?:' + '|'.join(_BAD_STARTS) + r')\b')
+
+
+def _build_reasoning_automaton():
+    """Строит автомат Ахо-Корасик по шаблонам рассуждений (если доступен pyahocorasick)"""
+    if not AHOCORASICK_SUPPORT:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for pattern in _REASONING_PATTERNS:
+        automaton.add_word(pattern, pattern)
+    automaton.make_automaton()
+    return automaton
+
+
+_REASONING_AUTOMATON = _build_reasoning_automaton()
+
+
+def _is_word_char(char: str) -> bool:
+    """Проверяет, является ли символ частью слова (как \\w в re)"""
+    return char.isalnum() or char == '_'
+
+
+def _is_reasoning_line(line_lower: str) -> bool:
+    """
+    Проверяет, содержит ли строка шаблон рассуждения отдельным словом
+
+    С pyahocorasick строка просматривается один раз автоматом по всем
+    шаблонам сразу, иначе используется _REASONING_RE.
+
+    Args:
+        line_lower: Строка в нижнем регистре
+
+    Returns:
+        True, если строка похожа на рассуждение модели
+    """
+    if _REASONING_AUTOMATON is None:
+        return _REASONING_RE.search(line_lower) is not None
+
+    last = len(line_lower) - 1
+    for end, pattern in _REASONING_AUTOMATON.iter(line_lower):
+        start = end - len(pattern) + 1
+        if ((start == 0 or not _is_word_char(line_lower[start - 1])) and
+                (end == last or not _is_word_char(line_lower[end + 1]))):
+            return True
+    return False
+
+# Строка ответа на групповой перевод: "<номер>. <перевод>"
+_NUMBERED_LINE_RE = re.compile(r'^\s*(\d+)\.\s*(.*)$', re.MULTILINE)
+
+# Ошибки разбора JSON-ответа API
+_JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError) if IJSON_SUPPORT else (json.JSONDecodeError,)
+
+
+class CustomDictionaryEntry(NamedTuple):
+    """Запись пользовательского словаря (кортеж без накладных расходов словаря)"""
+    translation: str
+    pos_tag: str
+    added_at: float  # время добавления, секунды с начала эпохи
+
+    @classmethod
+    def from_json(cls, value: Any) -> 'CustomDictionaryEntry':
+        """
+        Восстанавливает запись из JSON-представления
+
+        Args:
+            value: Список [translation, pos_tag, added_at] или словарь прежнего формата
+
+        Returns:
+            Запись словаря
+        """
+        if isinstance(value, dict):
+            try:
+                added_at = time.mktime(time.strptime(value.get('added_date', ''), "%Y-%m-%d %H:%M:%S"))
+            except ValueError:
+                added_at = 0.0
+            return cls(value.get('translation', ''), value.get('pos_tag', ''), added_at)
+
+        translation, pos_tag, added_at = value
+        return cls(translation, pos_tag, float(added_at))
+
+
+class RateLimiter:
+    """Ограничивает число вызовов в скользящем окне времени"""
+
+    def __init__(self, max_calls: int, period: float = 1.0):
+        """
+        Args:
+            max_calls: Максимальное число вызовов за период
+            period: Длина периода в секундах
+        """
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Блокирует поток, пока вызов не станет допустимым"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+
+                wait = self.period - (now - self._calls[0])
+
+            time.sleep(wait)
 
 
 class TranslationModule:
     """Класс для машинного перевода текстов"""
 
+    # Неизменные части запроса к API (общие для всех вызовов)
+    _BASE_HEADERS = {
+        'Content-Type': 'application/json',
+        'HTTP-Referer': 'http://localhost:8000',
+        'X-Title': 'Machine Translation System'
+    }
+    _SYSTEM_MSG = {
+        'role': 'system',
+        'content': 'You are a professional translator. Provide only the translation without any additional text.'
+    }
+
     def __init__(self):
         """Инициализация модуля перевода"""
         self.api_key = Config.OPENROUTER_API_KEY
+        self._auth_header = f'Bearer {self.api_key}'
         self.api_url = Config.OPENROUTER_API_URL
         self.model = Config.OPENROUTER_MODEL
 
-        # Кэш для хранения переводов
-        self.translation_cache = {}
+        # Кэш для хранения переводов (LRU, не более Config.TRANSLATION_CACHE_MAX записей)
+        self.translation_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Число успешных переводов в кэше (поддерживается при вставке/вытеснении)
+        self._success_count = 0
+
+        # Постоянный кэш (переживает перезапуск и доступен другим процессам)
+        self._cache_store = TranslationCacheStore()
+
+        # Ограничение частоты запросов при пакетном переводе
+        self._rate_limiter = RateLimiter(Config.TRANSLATION_RATE_LIMIT)
+
+        # Общая HTTP-сессия: переиспользует соединения и повторяет неудачные запросы
+        self._session = self._create_session()
 
         # Простой и строгий промпт для перевода
         self.translation_prompt = (
@@ -30,8 +214,11 @@ class TranslationModule:
             "Return ONLY the translated text without any explanations, thoughts, or additional text."
         )
 
-        # Словарь для хранения пользовательских терминов
-        self.custom_dictionary = {}
+        # Готовые префиксы промпта для каждой пары языков
+        self._prompt_prefixes: Dict[str, str] = {}
+
+        # Словарь для хранения пользовательских терминов: слово -> список CustomDictionaryEntry
+        self.custom_dictionary: Dict[str, List[CustomDictionaryEntry]] = {}
 
     def translate_text(self,
                        text: str,
@@ -65,12 +252,6 @@ class TranslationModule:
                 'source_text': text
             }
 
-        # Проверяем кэш
-        cache_key = f"{text}_{lang_pair}"
-        if use_cache and cache_key in self.translation_cache:
-            logger.info(f"Используется кэшированный перевод для ключа: {cache_key[:50]}...")
-            return self.translation_cache[cache_key]
-
         # Проверяем наличие API ключа
         if not self.api_key or self.api_key == "":
             return {
@@ -81,111 +262,22 @@ class TranslationModule:
                 'suggestion': 'Создайте файл .env в корне проекта и добавьте OPENROUTER_API_KEY=ваш_ключ'
             }
 
-        # Определяем языки
-        source_lang = lang_pair.split('-')[0]
-        target_lang = lang_pair.split('-')[1]
-
-        # Строгие инструкции для перевода
-        translation_instruction = (
-            f"Translate the following text from {source_lang.upper()} to {target_lang.upper()}.\n\n"
-            "IMPORTANT: You must return ONLY the translated text without:\n"
-            "1. Any explanations or thoughts\n"
-            "2. Phrases like 'Alright', 'Let me translate', 'First', etc.\n"
-            "3. Any additional commentary\n"
-            "4. Any markdown formatting\n"
-            "5. Any prefixes like 'Translation:' or 'The translation is:'\n\n"
-            "Text to translate:\n"
-            f"{text}"
-        )
+        # Проверяем кэш
+        cache_key = self._make_cache_key(text, lang_pair)
+        if use_cache:
+            cached = self._lookup_cache(text, lang_pair, cache_key)
+            if cached is not None:
+                return cached
 
         # Формируем полный промпт
-        full_prompt = f"{self.translation_prompt}\n\n{translation_instruction}"
+        full_prompt = self._get_prompt_prefix(lang_pair) + text
 
         try:
-            # Подготавливаем запрос к API
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json',
-                'HTTP-Referer': 'http://localhost:8000',
-                'X-Title': 'Machine Translation System'
-            }
-
-            payload = {
-                'model': self.model,
-                'messages': [
-                    {'role': 'system', 'content': 'You are a professional translator. Provide only the translation without any additional text.'},
-                    {'role': 'user', 'content': full_prompt}
-                ],
-                'max_tokens': min(len(text) * 2, 4000),
-                'temperature': 0.1,  # Низкая температура для детерминированных ответов
-                'top_p': 0.8
-            }
-
-            logger.info(f"Отправка запроса на перевод (длина текста: {len(text)})...")
-
-            # Отправляем запрос
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-
-            # Проверяем ответ
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-
-                    # Проверяем структуру ответа
-                    if 'choices' not in result or not result['choices']:
-                        error_msg = f"Неверная структура ответа API: {result}"
-                        logger.error(error_msg)
-                        return {
-                            'success': False,
-                            'error': error_msg,
-                            'translated_text': '',
-                            'source_text': text
-                        }
-
-                    # Извлекаем переведенный текст
-                    translated_text = result['choices'][0]['message']['content'].strip()
-
-                    # Очищаем текст от возможных рассуждений модели
-                    translated_text = self._clean_translation_output(translated_text)
-
-                    # Форматируем результат
-                    translation_result = format_translation_result(text, translated_text, lang_pair, 'general')
-                    translation_result['success'] = True
-                    translation_result['api_response'] = result
-                    translation_result['cache_key'] = cache_key
-
-                    # Сохраняем в кэш
-                    self.translation_cache[cache_key] = translation_result
-
-                    logger.info(f"Перевод успешно выполнен (символов: {len(translated_text)})")
-                    return translation_result
-
-                except json.JSONDecodeError as e:
-                    error_msg = f"Ошибка парсинга JSON ответа: {e}. Ответ: {response.text[:200]}"
-                    logger.error(error_msg)
-                    return {
-                        'success': False,
-                        'error': error_msg,
-                        'translated_text': '',
-                        'source_text': text
-                    }
-
-            else:
-                error_msg = f"Ошибка API: {response.status_code} - {response.text[:200]}"
-                logger.error(error_msg)
+            logger.info("Отправка запроса на перевод (длина текста: %d)...", len(text))
 
-                return {
-                    'success': False,
-                    'error': error_msg,
-                    'status_code': response.status_code,
-                    'translated_text': '',
-                    'source_text': text
-                }
+            # Отправляем запрос (тело ответа читается потоково)
+            with self._post_completion(full_prompt, min(len(text) * 2, 4000)) as response:
+                return self._handle_response(response, text, lang_pair, cache_key)
 
         except requests.exceptions.Timeout:
             error_msg = "Таймаут при обращении к API перевода (30 секунд)"
@@ -220,6 +312,257 @@ class TranslationModule:
                 'source_text': text
             }
 
+    def _post_completion(self, prompt: str, max_tokens: int) -> requests.Response:
+        """
+        Отправляет промпт в API (ответ открыт в потоковом режиме)
+
+        Args:
+            prompt: Промпт пользователя
+            max_tokens: Ограничение длины ответа
+
+        Returns:
+            Ответ API; вызывающий код должен закрыть его (with)
+        """
+        # Подготавливаем запрос к API
+        headers = {**self._BASE_HEADERS, 'Authorization': self._auth_header}
+
+        payload = {
+            'model': self.model,
+            'messages': [
+                self._SYSTEM_MSG,
+                {'role': 'user', 'content': prompt}
+            ],
+            'max_tokens': max_tokens,
+            'temperature': 0.1,  # Низкая температура для детерминированных ответов
+            'top_p': 0.8
+        }
+
+        return self._session.post(
+            self.api_url,
+            headers=headers,
+            json=payload,
+            timeout=30,
+            stream=True
+        )
+
+    def _handle_response(self,
+                         response: requests.Response,
+                         text: str,
+                         lang_pair: str,
+                         cache_key: bytes) -> Dict[str, Any]:
+        """
+        Обрабатывает ответ API перевода
+
+        Args:
+            response: Ответ API (открытый в потоковом режиме)
+            text: Исходный текст
+            lang_pair: Пара языков
+            cache_key: Ключ кэша
+
+        Returns:
+            Словарь с результатами перевода
+        """
+        # Проверяем ответ
+        if response.status_code != 200:
+            error_msg = f"Ошибка API: {response.status_code} - {response.text[:200]}"
+            logger.error(error_msg)
+
+            return {
+                'success': False,
+                'error': error_msg,
+                'status_code': response.status_code,
+                'translated_text': '',
+                'source_text': text
+            }
+
+        try:
+            translated_text = self._read_translation_content(response)
+        except _JSON_ERRORS as e:
+            error_msg = f"Ошибка парсинга JSON ответа: {e}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg,
+                'translated_text': '',
+                'source_text': text
+            }
+
+        # Проверяем структуру ответа
+        if translated_text is None:
+            error_msg = "Неверная структура ответа API: отсутствует choices[0].message.content"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg,
+                'translated_text': '',
+                'source_text': text
+            }
+
+        # Очищаем текст от возможных рассуждений модели
+        translated_text = self._clean_translation_output(translated_text.strip())
+
+        # Форматируем результат и сохраняем в кэш
+        translation_result = self._make_translation_result(text, translated_text, lang_pair, cache_key)
+        self._cache_store.put(cache_key, lang_pair, translated_text)
+
+        logger.info("Перевод успешно выполнен (символов: %d)", len(translated_text))
+        return translation_result
+
+    def _make_translation_result(self,
+                                 text: str,
+                                 translated_text: str,
+                                 lang_pair: str,
+                                 cache_key: bytes) -> Dict[str, Any]:
+        """Формирует успешный результат перевода и помещает его в кэш в памяти"""
+        translation_result = format_translation_result(text, translated_text, lang_pair, 'general')
+        translation_result['success'] = True
+        translation_result['cache_key'] = cache_key.hex()
+
+        self._put_cached(cache_key, translation_result)
+        return translation_result
+
+    @staticmethod
+    def _read_translation_content(response: requests.Response) -> Optional[str]:
+        """
+        Извлекает choices[0].message.content из ответа API
+
+        При наличии ijson тело разбирается потоково (без построения всего
+        словаря), иначе разбирается весь JSON. Тело всегда дочитывается до конца,
+        чтобы соединение вернулось в пул сессии.
+
+        Args:
+            response: Ответ API (открытый в потоковом режиме)
+
+        Returns:
+            Текст перевода или None, если поле отсутствует или не является строкой
+        """
+        if IJSON_SUPPORT:
+            response.raw.decode_content = True
+            content = None
+            for value in ijson.items(response.raw, 'choices.item.message.content'):
+                if content is None and isinstance(value, str):
+                    content = value
+            # Дочитываем остаток тела: недочитанный поток закрывается вместо возврата в пул
+            response.raw.read()
+            return content
+
+        try:
+            content = json_loads(response.content)['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            return None
+        return content if isinstance(content, str) else None
+
+    def _get_prompt_prefix(self, lang_pair: str) -> str:
+        """
+        Возвращает неизменную часть промпта для пары языков (строится один раз)
+
+        Args:
+            lang_pair: Пара языков (например, 'en-ru')
+
+        Returns:
+            Промпт, к которому остается дописать текст для перевода
+        """
+        prefix = self._prompt_prefixes.get(lang_pair)
+        if prefix is not None:
+            return prefix
+
+        # Определяем языки
+        source_lang, target_lang = lang_pair.split('-')
+
+        # Строгие инструкции для перевода
+        translation_instruction = (
+            f"Translate the following text from {source_lang.upper()} to {target_lang.upper()}.\n\n"
+            "IMPORTANT: You must return ONLY the translated text without:\n"
+            "1. Any explanations or thoughts\n"
+            "2. Phrases like 'Alright', 'Let me translate', 'First', etc.\n"
+            "3. Any additional commentary\n"
+            "4. Any markdown formatting\n"
+            "5. Any prefixes like 'Translation:' or 'The translation is:'\n\n"
+            "Text to translate:\n"
+        )
+
+        prefix = f"{self.translation_prompt}\n\n{translation_instruction}"
+        self._prompt_prefixes[lang_pair] = prefix
+        return prefix
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Создает HTTP-сессию с пулом соединений и повторными попытками"""
+        # Таймаут чтения не повторяем: запрос уже принят сервером и может быть оплачен
+        retry = Retry(
+            total=3,
+            read=False,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4,
+                              pool_maxsize=Config.TRANSLATION_CONCURRENCY,
+                              max_retries=retry)
+
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @staticmethod
+    def _make_cache_key(text: str, lang_pair: str) -> bytes:
+        """
+        Формирует ключ кэша фиксированной длины
+
+        Args:
+            text: Текст для перевода
+            lang_pair: Пара языков
+
+        Returns:
+            16-байтовый дайджест blake2b от пары языков и текста
+        """
+        return hashlib.blake2b(f"{lang_pair}\0".encode() + text.encode('utf-8'),
+                               digest_size=16).digest()
+
+    def _get_cached(self, cache_key: bytes) -> Optional[Dict[str, Any]]:
+        """Возвращает перевод из кэша или None"""
+        with self._cache_lock:
+            cached = self.translation_cache.get(cache_key)
+            if cached is None:
+                return None
+            self.translation_cache.move_to_end(cache_key)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Используется кэшированный перевод для ключа: %s...", cache_key.hex()[:16])
+        return cached
+
+    def _lookup_cache(self, text: str, lang_pair: str, cache_key: bytes) -> Optional[Dict[str, Any]]:
+        """Ищет перевод в кэше в памяти, затем в постоянном кэше"""
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+
+        stored_translation = self._cache_store.get(cache_key)
+        if stored_translation is None:
+            return None
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Используется сохраненный перевод для ключа: %s...", cache_key.hex()[:16])
+        return self._make_translation_result(text, stored_translation, lang_pair, cache_key)
+
+    def _put_cached(self, cache_key: bytes, translation_result: Dict[str, Any]):
+        """Сохраняет перевод в кэш, вытесняя давно не использованные записи"""
+        with self._cache_lock:
+            previous = self.translation_cache.get(cache_key)
+            if previous is not None and previous.get('success', False):
+                self._success_count -= 1
+            if translation_result.get('success', False):
+                self._success_count += 1
+
+            self.translation_cache[cache_key] = translation_result
+            self.translation_cache.move_to_end(cache_key)
+            while len(self.translation_cache) > Config.TRANSLATION_CACHE_MAX:
+                _, evicted = self.translation_cache.popitem(last=False)
+                if evicted.get('success', False):
+                    self._success_count -= 1
+
     def _clean_translation_output(self, text: str) -> str:
         """
         Очищает вывод перевода от нежелательных элементов
@@ -231,58 +574,34 @@ class TranslationModule:
             Очищенный перевод
         """
         # Убираем распространенные префиксы
-        prefixes_to_remove = [
-            'Alright, ',
-            'Okay, ',
-            'So, ',
-            'The translation is: ',
-            'Translated text: ',
-            'Here is the translation: ',
-            'Перевод: ',
-            'Вот перевод: '
-        ]
-
-        for prefix in prefixes_to_remove:
-            if text.startswith(prefix):
-                text = text[len(prefix):]
+        text = _PREFIX_RE.sub('', text, count=1)
 
         # Разделяем на строки и убираем строки, которые выглядят как рассуждения
         lines = text.split('\n')
         cleaned_lines = []
 
-        # Шаблоны строк, которые нужно удалить (рассуждения модели)
-        reasoning_patterns = [
-            'alright', 'let\'s', 'first', 'i need', 'the key terms',
-            'now', 'putting it', 'final check', 'so the final',
-            'давайте', 'сначала', 'ключевые термины',
-            'теперь', 'собирая все вместе', 'итоговый перевод'
-        ]
-
         for line in lines:
-            line_lower = line.lower().strip()
+            stripped = line.strip()
             # Пропускаем пустые строки
-            if not line_lower:
+            if not stripped:
+                continue
+            line_lower = stripped.lower()
+
+            # Пропускаем строки, которые являются рассуждениями,
+            # а также строки, которые выглядят как команды или вопросы
+            if (_is_reasoning_line(line_lower) or
+                    _BAD_START_RE.match(line_lower) or
+                    line_lower.endswith('?') or
+                    'let me' in line_lower or
+                    'i think' in line_lower):
                 continue
 
-            # Пропускаем строки, которые являются рассуждениями
-            is_reasoning = any(pattern in line_lower for pattern in reasoning_patterns)
-            if not is_reasoning:
-                # Также пропускаем строки, которые выглядят как команды или вопросы
-                if not (line_lower.startswith(('wait', 'hmm', 'um', 'well')) or
-                        line_lower.endswith('?') or
-                        'let me' in line_lower or
-                        'i think' in line_lower):
-                    cleaned_lines.append(line.strip())
+            cleaned_lines.append(stripped)
 
         # Если после очистки остались строки, объединяем их
+        # (иначе возвращаем исходный текст без очевидных префиксов)
         if cleaned_lines:
             text = ' '.join(cleaned_lines)
-        else:
-            # Если все строки были удалены, возвращаем оригинальный текст
-            # но убираем только очевидные префиксы
-            for prefix in prefixes_to_remove:
-                if text.startswith(prefix):
-                    text = text[len(prefix):]
 
         return text.strip()
 
@@ -292,27 +611,175 @@ class TranslationModule:
         """
         Пакетный перевод нескольких текстов
 
+        Короткие однострочные тексты объединяются в группы и переводятся одним
+        запросом (нумерованными строками). Запросы выполняются параллельно
+        (Config.TRANSLATION_CONCURRENCY потоков) с ограничением частоты
+        Config.TRANSLATION_RATE_LIMIT запросов в секунду.
+
         Args:
             texts: Список текстов для перевода
             lang_pair: Пара языков
 
         Returns:
-            Список результатов перевода
+            Список результатов перевода в порядке исходных текстов
         """
-        results = []
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        pending = []
+
+        # Кэшированные переводы не занимают рабочий поток
+        for i, text in enumerate(texts):
+            cached = self._lookup_cache(text, lang_pair, self._make_cache_key(text, lang_pair)) if text else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        if pending:
+            groups = self._group_for_batch(texts, pending)
+            logger.info("Пакетный перевод: %d из %d текстов требуют запроса к API (%d запросов)",
+                        len(pending), len(texts), len(groups))
+
+            with ThreadPoolExecutor(max_workers=Config.TRANSLATION_CONCURRENCY) as executor:
+                futures = [(group, executor.submit(self._rate_limited_translate_group,
+                                                   [texts[i] for i in group], lang_pair))
+                           for group in groups]
+                for group, future in futures:
+                    for i, result in zip(group, future.result()):
+                        results[i] = result
+
+        return results
+
+    def _group_for_batch(self, texts: List[str], indices: List[int]) -> List[List[int]]:
+        """
+        Делит тексты на группы для совместного перевода
+
+        В группу попадают только непустые однострочные тексты, суммарная длина
+        которых не превышает Config.TRANSLATION_GROUP_MAX_LENGTH; остальные
+        тексты образуют группы из одного элемента.
+
+        Args:
+            texts: Список текстов
+            indices: Индексы текстов, требующих перевода
+
+        Returns:
+            Список групп индексов
+        """
+        groups = []
+        current = []
+        current_length = 0
+
+        for i in indices:
+            text = texts[i]
+            if not text or '\n' in text or len(text) > Config.TRANSLATION_GROUP_MAX_LENGTH:
+                groups.append([i])
+                continue
+
+            if current and current_length + len(text) > Config.TRANSLATION_GROUP_MAX_LENGTH:
+                groups.append(current)
+                current = []
+                current_length = 0
+
+            current.append(i)
+            current_length += len(text)
+
+        if current:
+            groups.append(current)
+
+        return groups
+
+    def _rate_limited_translate_group(self, texts: List[str], lang_pair: str) -> List[Dict[str, Any]]:
+        """
+        Переводит группу текстов, соблюдая ограничение частоты запросов
 
-        for i, text in enumerate(texts, 1):
-            logger.info(f"Перевод текста {i}/{len(texts)}...")
+        Если групповой ответ не удалось разобрать, тексты переводятся по одному.
+        """
+        if len(texts) > 1 and self.api_key:
+            self._rate_limiter.acquire()
+            group_results = self._translate_group(texts, lang_pair)
+            if group_results is not None:
+                return group_results
 
-            result = self.translate_text(text, lang_pair)
-            results.append(result)
+        return [self._rate_limited_translate(text, lang_pair) for text in texts]
 
-            # Небольшая задержка между запросами
-            if i < len(texts):
-                time.sleep(0.5)
+    def _translate_group(self, texts: List[str], lang_pair: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Переводит несколько коротких текстов одним запросом
+
+        Args:
+            texts: Однострочные тексты
+            lang_pair: Пара языков
+
+        Returns:
+            Список результатов перевода или None, если ответ не удалось разобрать
+        """
+        source_lang, target_lang = lang_pair.split('-')
+        prompt = (
+            f"Translate each numbered line from {source_lang.upper()} to {target_lang.upper()}.\n"
+            "Return exactly one line per input, prefixed with its number, "
+            "without any explanations or additional text.\n\n"
+            + "\n".join(f"{number}. {text}" for number, text in enumerate(texts, 1))
+        )
+        total_length = sum(len(text) for text in texts)
+
+        try:
+            logger.info("Отправка группового запроса на перевод (%d текстов)...", len(texts))
+
+            with self._post_completion(prompt, min(total_length * 2 + 10 * len(texts), 4000)) as response:
+                if response.status_code != 200:
+                    logger.error("Ошибка API при групповом переводе: %s", response.status_code)
+                    return None
+                content = self._read_translation_content(response)
+
+        except (requests.exceptions.RequestException,) + _JSON_ERRORS as e:
+            logger.error("Ошибка при групповом переводе: %s", e)
+            return None
+        except Exception as e:
+            # Групповой путь не должен прерывать batch_translate - переводим по одному
+            logger.error("Неожиданная ошибка при групповом переводе: %s", e)
+            return None
+
+        translations = self._parse_numbered_lines(content or '', len(texts))
+        if translations is None:
+            logger.warning("Не удалось разобрать групповой перевод, тексты будут переведены по одному")
+            return None
+
+        results = []
+        for text, translated_text in zip(texts, translations):
+            translated_text = self._clean_translation_output(translated_text)
+            cache_key = self._make_cache_key(text, lang_pair)
+            results.append(self._make_translation_result(text, translated_text, lang_pair, cache_key))
+            self._cache_store.put(cache_key, lang_pair, translated_text)
 
         return results
 
+    @staticmethod
+    def _parse_numbered_lines(content: str, count: int) -> Optional[List[str]]:
+        """
+        Разбирает ответ вида "1. ...\\n2. ..." на переводы
+
+        Args:
+            content: Ответ модели
+            count: Ожидаемое число строк
+
+        Returns:
+            Переводы по порядку или None, если номера не совпадают с ожидаемыми
+        """
+        translations = {}
+        for match in _NUMBERED_LINE_RE.finditer(content):
+            number = int(match.group(1))
+            if 1 <= number <= count and number not in translations:
+                translations[number] = match.group(2).strip()
+
+        if len(translations) != count or not all(translations.values()):
+            return None
+
+        return [translations[number] for number in range(1, count + 1)]
+
+    def _rate_limited_translate(self, text: str, lang_pair: str) -> Dict[str, Any]:
+        """Переводит текст, соблюдая ограничение частоты запросов"""
+        self._rate_limiter.acquire()
+        return self.translate_text(text, lang_pair)
+
     def add_to_custom_dictionary(self,
                                 source_word: str,
                                 translation: str,
@@ -333,13 +800,9 @@ class TranslationModule:
         if key not in self.custom_dictionary:
             self.custom_dictionary[key] = []
 
-        self.custom_dictionary[key].append({
-            'translation': translation,
-            'pos_tag': pos_tag,
-            'added_date': time.strftime("%Y-%m-%d %H:%M:%S")
-        })
+        self.custom_dictionary[key].append(CustomDictionaryEntry(translation, pos_tag, time.time()))
 
-        logger.info(f"Добавлено в словарь: '{source_word}' -> '{translation}'")
+        logger.info("Добавлено в словарь: '%s' -> '%s'", source_word, translation)
 
     def get_custom_translation(self, word: str) -> Optional[str]:
         """
@@ -358,13 +821,16 @@ class TranslationModule:
 
             # Возвращаем первый доступный перевод
             if entries:
-                return entries[0]['translation']
+                return entries[0].translation
 
         return None
 
     def clear_cache(self):
         """Очищает кэш переводов"""
-        self.translation_cache.clear()
+        with self._cache_lock:
+            self.translation_cache.clear()
+            self._success_count = 0
+        self._cache_store.clear()
         logger.info("Кэш переводов очищен")
 
     def get_translation_stats(self) -> Dict[str, Any]:
@@ -374,17 +840,16 @@ class TranslationModule:
         Returns:
             Словарь со статистикой
         """
-        total_translations = len(self.translation_cache)
+        with self._cache_lock:
+            total_translations = len(self.translation_cache)
+            # Счетчик поддерживается в _put_cached, пересчет не нужен
+            successful = self._success_count
         total_custom_words = len(self.custom_dictionary)
 
-        # Подсчитываем успешные переводы
-        successful = sum(1 for result in self.translation_cache.values()
-                        if result.get('success', False))
-
         return {
             'total_translations': total_translations,
             'successful_translations': successful,
-            'cache_size': len(self.translation_cache),
+            'cache_size': total_translations,
             'custom_dictionary_size': total_custom_words,
             'success_rate': (successful / total_translations * 100) if total_translations > 0 else 0
         }
@@ -393,32 +858,56 @@ class TranslationModule:
         """
         Сохраняет пользовательский словарь в файл
 
+        Формат - JSON Lines: одна строка {"word": ..., "entries": [...]} на слово,
+        поэтому в памяти одновременно сериализуется только одна запись.
+        Каждая запись сохраняется списком [translation, pos_tag, added_at].
+
         Args:
             filepath: Путь к файлу
         """
         try:
-            import json
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.custom_dictionary, f, ensure_ascii=False, indent=2)
-            logger.info(f"Пользовательский словарь сохранен в {filepath}")
+                for word, entries in self.custom_dictionary.items():
+                    f.write(json_dumps({'word': word, 'entries': [list(entry) for entry in entries]}))
+                    f.write('\n')
+            logger.info("Пользовательский словарь сохранен в %s", filepath)
             return True
         except Exception as e:
-            logger.error(f"Ошибка при сохранении словаря: {e}")
+            logger.error("Ошибка при сохранении словаря: %s", e)
             return False
 
     def load_custom_dictionary(self, filepath: str):
         """
         Загружает пользовательский словарь из файла
 
+        Поддерживается формат JSON Lines (см. save_custom_dictionary), а также
+        прежний формат - один JSON-объект на весь файл.
+
         Args:
             filepath: Путь к файлу
         """
         try:
-            import json
+            custom_dictionary = {}
             with open(filepath, 'r', encoding='utf-8') as f:
-                self.custom_dictionary = json.load(f)
-            logger.info(f"Пользовательский словарь загружен из {filepath}")
+                try:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json_loads(line)
+                        custom_dictionary[record['word']] = [
+                            CustomDictionaryEntry.from_json(entry) for entry in record['entries']
+                        ]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    # Файл в прежнем формате (единый JSON-объект)
+                    f.seek(0)
+                    custom_dictionary = {
+                        word: [CustomDictionaryEntry.from_json(entry) for entry in entries]
+                        for word, entries in json_loads(f.read()).items()
+                    }
+
+            self.custom_dictionary = custom_dictionary
+            logger.info("Пользовательский словарь загружен из %s", filepath)
             return True
         except Exception as e:
-            logger.error(f"Ошибка при загрузке словаря: {e}")
+            logger.error("Ошибка при загрузке словаря: %s", e)
             return False
\ No newline at end of file
@@ -9,10 +9,28 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+try:
+    import orjson
+
+    ORJSON_SUPPORT = True
+except ImportError:
+    ORJSON_SUPPORT = False
+
+# Регулярные выражения для clean_text
+_WS_RE = re.compile(r'\s+')
+_WS_TO_NORMALIZE_RE = re.compile(r'\s{2,}|[^\S ]')
+
+
+# Логгер модуля; обработчики настраиваются точкой входа через setup_logging()
+logger = logging.getLogger(__name__)
+
 
 # Настройка логирования
 def setup_logging():
-    """Настраивает логирование системы"""
+    """Настраивает логирование системы (повторные вызовы ничего не делают)"""
+    if logging.getLogger().hasHandlers():
+        return logger
+
     from config import Config
 
     # Создаем директорию для логов если её нет
@@ -26,9 +44,8 @@ def setup_logging():
             logging.StreamHandler()
         ]
     )
-    return logging.getLogger(__name__)
+    return logger
 
-logger = setup_logging()
 
 def clean_text(text: str) -> str:
     """
@@ -43,8 +60,10 @@ def clean_text(text: str) -> str:
     if not text:
         return ""
 
-    # Удаляем множественные пробелы
-    text = re.sub(r'\s+', ' ', text)
+    # Удаляем множественные пробелы (только если есть что заменять -
+    # для уже нормализованного текста не создаем новую строку)
+    if _WS_TO_NORMALIZE_RE.search(text):
+        text = _WS_RE.sub(' ', text)
     # Удаляем пробелы в начале и конце
     text = text.strip()
     # Заменяем кавычки на стандартные
@@ -53,6 +72,43 @@ def clean_text(text: str) -> str:
     return text
 
 
+def json_dumps(data: Any, indent: bool = False) -> str:
+    """
+    Сериализует данные в JSON (через orjson, если он установлен)
+
+    Args:
+        data: Данные для сериализации
+        indent: Форматировать с отступом в 2 пробела
+
+    Returns:
+        JSON-строка (без экранирования не-ASCII символов)
+    """
+    if ORJSON_SUPPORT:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(data, option=option).decode('utf-8')
+        except TypeError:
+            # Типы, которые orjson не поддерживает (например, namedtuple)
+            pass
+
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None)
+
+
+def json_loads(data: Any) -> Any:
+    """
+    Разбирает JSON из строки или байтов (через orjson, если он установлен)
+
+    Args:
+        data: JSON-строка или байты
+
+    Returns:
+        Разобранные данные
+    """
+    if ORJSON_SUPPORT:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def save_to_file(data: Any, filepath: str, encoding: str = 'utf-8'):
     """
     Сохраняет данные в файл
@@ -65,7 +121,7 @@ def save_to_file(data: Any, filepath: str, encoding: str = 'utf-8'):
     try:
         with open(filepath, 'w', encoding=encoding) as f:
             if isinstance(data, (dict, list)):
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.write(json_dumps(data, indent=True))
             else:
                 f.write(str(data))
         logger.info(f"Данные сохранены в файл: {filepath}")
@@ -89,7 +145,7 @@ def load_from_file(filepath: str, encoding: str = 'utf-8') -> Any:
     try:
         if filepath.endswith('.json'):
             with open(filepath, 'r', encoding=encoding) as f:
-                return json.load(f)
+                return json_loads(f.read())
         else:
             with open(filepath, 'r', encoding=encoding) as f:
                 return f.read()
@@ -3,20 +3,115 @@ from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
 import json
 import queue
-import os
+import hashlib
+import gc
+import io
+import importlib.util
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
-import requests
-import speech_recognition as sr
-import pygame
-import tempfile
-from gtts import gTTS
 from pathlib import Path
 import logging
 
+# requests, speech_recognition, pygame и gTTS импортируются при первом
+# использовании, чтобы не задерживать появление окна
+
+try:
+    import webrtcvad
+    WEBRTCVAD_SUPPORT = True
+except ImportError:
+    WEBRTCVAD_SUPPORT = False
+
+# Локальное распознавание речи; модель тяжелая, поэтому загружается при первой записи
+FASTER_WHISPER_SUPPORT = importlib.util.find_spec('faster_whisper') is not None
+
+try:
+    import orjson
+    ORJSON_SUPPORT = True
+except ImportError:
+    ORJSON_SUPPORT = False
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Значения API конфигурации по умолчанию
+API_CONFIG_DEFAULTS = {
+    'api_key': '',
+    'model_url': 'https://openrouter.ai/api/v1/chat/completions',
+    'model': 'xiaomi/mimo-v2-flash:free'
+}
+
+# Каталог для кэша синтезированной речи
+TTS_CACHE_DIR = Path.home() / ".cache" / "voicegpt"
+
+# Фразы, которые заранее синтезируются в кэш при запуске
+FIXED_PHRASES = [
+    "Готов к работе",
+    "Ответ получен",
+    "Речь не распознана",
+    "Таймаут запроса",
+]
+
+# Формат времени сообщений чата
+TIMESTAMP_FORMAT = "%H:%M:%S"
+
+# Ограничения истории чата: сообщений в памяти и строк в виджете
+CHAT_HISTORY_MAX = 500
+CHAT_WIDGET_MAX_LINES = 2000
+CHAT_WIDGET_TRIM_LINES = 500
+
+# Клавиши, разрешенные в истории чата (только навигация и выделение/копирование)
+CHAT_NAVIGATION_KEYS = frozenset({'Left', 'Right', 'Up', 'Down', 'Home', 'End', 'Prior', 'Next'})
+CHAT_CONTROL_KEYS = frozenset({'c', 'a', 'insert', 'slash'})  # с Ctrl, в нижнем регистре
+
+# Короткие фразы держим декодированными в памяти (pygame.mixer.Sound)
+SOUND_CACHE_MAX = 32
+SOUND_MAX_FILE_SIZE = 64 * 1024
+
+# Через сколько воспроизведений принудительно собирать мусор
+GC_PLAYBACK_INTERVAL = 20
+
+# Интервал (мс) проверки очереди событий pygame во время воспроизведения
+PLAYBACK_PUMP_INTERVAL = 250
+
+# Сколько секунд ждать следующую фразу, прежде чем закончить запись
+STT_PHRASE_GAP_TIMEOUT = 2
+
+# Модель faster-whisper для локального распознавания (INT8 на CPU)
+WHISPER_MODEL_SIZE = "small"
+
+# Как часто (в секундах) повторять калибровку микрофона по шуму
+MIC_RECALIBRATE_INTERVAL = 300
+
+# Параметры детектора речи (webrtcvad): 16 кГц моно, кадры по 30 мс
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_SAMPLES = 480
+VAD_RING_FRAMES = 10     # окно для определения начала речи
+VAD_START_FRAMES = 3     # речевых кадров в окне для начала фразы
+VAD_END_FRAMES = 20      # кадров тишины подряд для конца фразы
+
+
+def _json_dumps(data):
+    """Сериализация в JSON (bytes), через orjson при наличии"""
+    if ORJSON_SUPPORT:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def _json_loads(data):
+    """Разбор JSON из bytes или str, через orjson при наличии"""
+    if ORJSON_SUPPORT:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _widget_text(widget):
+    """Текст виджета без пробелов по краям; пустой виджет не копируется"""
+    if widget.index('end-1c') == '1.0':
+        return ''
+    return widget.get('1.0', 'end-1c').strip()
+
 
 class VoiceChatBot:
     def __init__(self, root):
@@ -25,8 +120,8 @@ class VoiceChatBot:
         self.root.geometry("1200x800")
         self.root.configure(bg='#2c3e50')
 
-        # Загружаем настройки в первую очередь
-        self.settings = self.load_settings()
+        # Настройки читаются после создания окна (см. _late_load_config)
+        self.settings = {}
 
         # Стили
         self.style = ttk.Style()
@@ -51,6 +146,17 @@ class VoiceChatBot:
         self.recording = False
         self.audio_thread = None
 
+        # Чтение файлов конфигурации не задерживает появление окна
+        self.root.after(0, self._late_load_config)
+
+    def _late_load_config(self):
+        """Загрузка настроек и API конфигурации после запуска главного цикла"""
+        self.settings = self.load_settings()
+        self.load_api_config()
+
+        # Фоновая подготовка кэша для часто озвучиваемых фраз
+        threading.Thread(target=self._preload_tts, daemon=True).start()
+
     def setup_ui(self):
         """Настройка пользовательского интерфейса"""
         # Заголовок
@@ -116,6 +222,15 @@ class VoiceChatBot:
         )
         self.chat_history.pack(fill='both', expand=True)
 
+        # Виджет всегда в состоянии 'normal', правка текста пользователем блокируется
+        self.chat_history.bind('<Key>', self._block_chat_edit)
+        for sequence in ('<<Paste>>', '<<Cut>>', '<<PasteSelection>>'):
+            self.chat_history.bind(sequence, lambda e: 'break')
+
+        # Теги заголовков сообщений настраиваются один раз
+        for sender, color in (("Вы", "#3498db"), ("AI", "#2ecc71"), ("Система", "#e74c3c")):
+            self.chat_history.tag_config(f"header_{sender}", foreground=color, font=('Segoe UI', 10, 'bold'))
+
         # Панель ввода
         input_frame = ttk.Frame(main_frame)
         input_frame.pack(fill='x', pady=(0, 10))
@@ -156,6 +271,14 @@ class VoiceChatBot:
         self.chat_input.bind('<Return>', lambda e: self.send_message())
         self.chat_input.bind('<Shift-Return>', lambda e: None)
 
+    def _block_chat_edit(self, event):
+        """Запрет правки истории чата: разрешены только навигация, выделение и копирование"""
+        if event.keysym in CHAT_NAVIGATION_KEYS:
+            return None
+        if event.state & 0x4 and event.keysym.lower() in CHAT_CONTROL_KEYS:
+            return None
+        return 'break'
+
     def setup_tts_tab(self):
         """Настройка вкладки синтеза речи"""
         main_frame = ttk.Frame(self.tts_tab)
@@ -313,37 +436,99 @@ class VoiceChatBot:
         self.stt_status.pack()
 
     def setup_audio(self):
-        """Инициализация аудио компонентов"""
-        pygame.mixer.init()
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        """Инициализация аудио компонентов (микшер и микрофон - при первом использовании)"""
+        self._audio_inited = False
+        self._playback_pump = None
+        self._tts_channel = None
+        self._sound_cache = OrderedDict()
+        self._tts_busy = False
+        self._playback_count = 0
+
+        self.recognizer = None
+        self.microphone = None
+        self.vad = None
+        self.whisper = None
+        self._whisper_failed = False
+
+        # Поток микрофона открывается при первой записи и остается открытым
+        self.mic_source = None
+        self._mic_calibrated_at = None
+
+        # Кэш синтезированной речи на диске
+        self.tts_cache_dir = TTS_CACHE_DIR
+        self.tts_cache_dir.mkdir(parents=True, exist_ok=True)
 
     def setup_chat(self):
         """Инициализация чата"""
-        self.chat_history_data = []
-        # Загрузка API ключа и модели из файла
-        self.load_api_config()
+        self.chat_history_data = deque(maxlen=CHAT_HISTORY_MAX)
+
+        # Значения по умолчанию; API ключ и модель загружаются из файла позже
+        self.apply_api_config(API_CONFIG_DEFAULTS)
+
+        # HTTP-сессия создается при первом запросе
+        self.http = None
+
+        # Пока ответ не получен полностью, новые сообщения не отправляются
+        self._chat_busy = False
+
+    def get_http_session(self):
+        """Одна сессия на все запросы: соединение с API переиспользуется"""
+        if self.http is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            })
+            self.http = session
+        return self.http
+
+    def init_playback(self):
+        """Инициализация pygame при первом воспроизведении"""
+        if self._audio_inited:
+            return
+
+        import pygame
+
+        pygame.mixer.init()
+        # Очередь событий pygame требует видеоподсистему (окно при этом не создается)
+        pygame.display.init()
+        self.tts_end_event = pygame.USEREVENT + 1
+        pygame.mixer.music.set_endevent(self.tts_end_event)
+        self._audio_inited = True
 
     def load_api_config(self):
         """Загрузка API конфигурации из файла"""
         config_file = Path('api_config.json')
-        if config_file.exists():
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    self.api_key = config.get('api_key', '')
-                    self.model_url = config.get('model_url', 'https://openrouter.ai/api/v1/chat/completions')
-                    self.model = config.get('model', 'xiaomi/mimo-v2-flash:free')
-            except:
-                self.api_key = ''
-                self.model_url = 'https://openrouter.ai/api/v1/chat/completions'
-                self.model = 'xiaomi/mimo-v2-flash:free'
-        else:
-            # Создаем файл с примером
-            self.api_key = ''
-            self.model_url = 'https://openrouter.ai/api/v1/chat/completions'
-            self.model = 'xiaomi/mimo-v2-flash:free'
-            self.save_api_config()
+        if not config_file.exists():
+            # Создаем файл с примером (в фоне, чтобы не блокировать интерфейс)
+            self.apply_api_config(API_CONFIG_DEFAULTS)
+            threading.Thread(target=self.save_api_config, daemon=True).start()
+            return
+
+        try:
+            config = json.loads(config_file.read_bytes())
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Не удалось прочитать {config_file}: {e}")
+            config = {}
+
+        # Корректный JSON, но не объект (например, [] или null)
+        if not isinstance(config, dict):
+            logger.warning(f"{config_file} не содержит объект JSON, используются значения по умолчанию")
+            config = {}
+
+        self.apply_api_config(API_CONFIG_DEFAULTS | config)
+
+    def apply_api_config(self, config):
+        """Применение API конфигурации"""
+        self.api_key = config['api_key']
+        self.model_url = config['model_url']
+        self.model = config['model']
 
     def save_api_config(self):
         """Сохранение API конфигурации в файл"""
@@ -360,10 +545,9 @@ class VoiceChatBot:
         settings_file = Path('voicegpt_settings.json')
         if settings_file.exists():
             try:
-                with open(settings_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
+                return json.loads(settings_file.read_bytes())
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Не удалось прочитать {settings_file}: {e}")
         return {}
 
     def start_recording(self):
@@ -381,39 +565,192 @@ class VoiceChatBot:
         self.audio_thread.start()
 
     def record_audio(self):
-        """Запись аудио"""
+        """Запись аудио по фразам, распознавание идет параллельно с записью"""
+        worker = None
+        capture_error = None
+
         try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                # Слушаем пока recording = True
-                audio = self.recognizer.listen(source, timeout=None, phrase_time_limit=None)
+            import speech_recognition as sr
 
-                # Если запись остановлена пользователем, прерываем распознавание
-                if not self.recording:
-                    return
+            worker = threading.Thread(target=self.recognize_audio, daemon=True)
+            worker.start()
 
-                text = self.recognizer.recognize_google(audio, language='ru-RU')
+            source = self.open_microphone()
 
-                self.root.after(0, self.update_stt_text, text)
-                self.root.after(0, lambda: self.stt_status.config(text="Распознавание завершено"))
+            # Первую фразу ждем без ограничения, следующие - не дольше паузы
+            timeout = None
+            while self.recording:
+                try:
+                    audio = self.listen_phrase(source, timeout)
+                except sr.WaitTimeoutError:
+                    break
 
-        except sr.WaitTimeoutError:
-            if self.recording:
-                self.root.after(0, lambda: self.stt_status.config(text="Таймаут записи"))
-        except sr.UnknownValueError:
-            if self.recording:
-                self.root.after(0, lambda: self.stt_status.config(text="Речь не распознана"))
-        except sr.RequestError as e:
-            if self.recording:
-                error_text = f"Ошибка сервиса: {str(e)}"
-                self.root.after(0, lambda: self.stt_status.config(text=error_text))
+                # Если запись остановлена пользователем, фразу не распознаем
+                if audio is None or not self.recording:
+                    break
+
+                # Фраза уходит на распознавание, а запись продолжается
+                self.audio_queue.put(audio)
+                timeout = STT_PHRASE_GAP_TIMEOUT
+
+        except ImportError as e:
+            capture_error = f"Распознавание речи недоступно: {str(e)}"
         except Exception as e:
             if self.recording:
-                error_text = f"Ошибка: {str(e)}"
-                self.root.after(0, lambda: self.stt_status.config(text=error_text))
+                capture_error = f"Ошибка: {str(e)}"
         finally:
+            if worker is not None:
+                self.audio_queue.put(None)
+                worker.join()
+            # Ошибка записи выводится после итогового статуса распознавания,
+            # чтобы он ее не перезаписал
+            if capture_error:
+                self.root.after(0, lambda: self.stt_status.config(text=capture_error))
             self.root.after(0, self.reset_recording_ui)
 
+    def open_microphone(self):
+        """
+        Источник звука с микрофона
+
+        Поток открывается один раз и переиспользуется между записями.
+        Калибровка по шуму нужна только без webrtcvad и повторяется
+        не чаще MIC_RECALIBRATE_INTERVAL.
+        """
+        import speech_recognition as sr
+
+        if self.mic_source is None:
+            self.recognizer = sr.Recognizer()
+            if WEBRTCVAD_SUPPORT:
+                # Детектор речи требует 16-битный звук с частотой 8/16/32/48 кГц
+                self.vad = webrtcvad.Vad(2)
+                self.microphone = sr.Microphone(sample_rate=VAD_SAMPLE_RATE, chunk_size=VAD_FRAME_SAMPLES)
+            else:
+                self.microphone = sr.Microphone()
+            self.mic_source = self.microphone.__enter__()
+
+        if self.vad is None:
+            now = time.monotonic()
+            if self._mic_calibrated_at is None or now - self._mic_calibrated_at > MIC_RECALIBRATE_INTERVAL:
+                self.recognizer.adjust_for_ambient_noise(self.mic_source, duration=0.8)
+                self._mic_calibrated_at = now
+
+        return self.mic_source
+
+    def listen_phrase(self, source, timeout):
+        """Запись одной фразы с микрофона
+
+        При наличии webrtcvad фраза начинается после нескольких речевых кадров
+        и заканчивается после серии кадров тишины, тишина в конце отбрасывается.
+
+        Returns:
+            sr.AudioData с фразой или None, если запись остановлена
+        """
+        import speech_recognition as sr
+
+        if self.vad is None:
+            return self.recognizer.listen(source, timeout=timeout, phrase_time_limit=None)
+
+        frame_duration = source.CHUNK / source.SAMPLE_RATE
+        ring = deque(maxlen=VAD_RING_FRAMES)
+        voiced_frames = []
+        triggered = False
+        silent_frames = 0
+        waited = 0.0
+
+        while self.recording:
+            frame = source.stream.read(source.CHUNK)
+            is_speech = self.vad.is_speech(frame, source.SAMPLE_RATE)
+
+            if not triggered:
+                ring.append((frame, is_speech))
+                if sum(1 for _, speech in ring if speech) >= VAD_START_FRAMES:
+                    # Начало фразы: сохраняем и кадры из окна, чтобы не обрезать первое слово
+                    triggered = True
+                    voiced_frames.extend(f for f, _ in ring)
+                    ring.clear()
+                else:
+                    waited += frame_duration
+                    if timeout is not None and waited > timeout:
+                        raise sr.WaitTimeoutError("Речь не началась за отведенное время")
+            else:
+                voiced_frames.append(frame)
+                silent_frames = 0 if is_speech else silent_frames + 1
+                if silent_frames >= VAD_END_FRAMES:
+                    break
+
+        if not self.recording or not voiced_frames:
+            return None
+
+        # Отбрасываем тишину в конце фразы
+        del voiced_frames[len(voiced_frames) - silent_frames:]
+        return sr.AudioData(b''.join(voiced_frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+    def recognize_audio(self):
+        """Распознавание записанных фраз из очереди"""
+        import speech_recognition as sr
+
+        recognized = False
+        error_text = None
+
+        while True:
+            audio = self.audio_queue.get()
+            if audio is None:
+                break
+
+            try:
+                text = self.transcribe(audio)
+            except sr.UnknownValueError:
+                continue
+            except sr.RequestError as e:
+                error_text = f"Ошибка сервиса: {str(e)}"
+                continue
+            except Exception as e:
+                error_text = f"Ошибка: {str(e)}"
+                continue
+
+            recognized = True
+            self.root.after(0, self.append_stt_text, text)
+
+        if recognized:
+            status = "Распознавание завершено"
+        else:
+            status = error_text or "Речь не распознана"
+        self.root.after(0, lambda: self.stt_status.config(text=status))
+
+    def transcribe(self, audio):
+        """
+        Распознавание фразы: локально через faster-whisper при наличии,
+        иначе через Google Speech Recognition
+
+        Args:
+            audio: sr.AudioData с фразой
+
+        Returns:
+            Распознанный текст
+        """
+        import speech_recognition as sr
+
+        if FASTER_WHISPER_SUPPORT and self.whisper is None and not self._whisper_failed:
+            self.root.after(0, lambda: self.stt_status.config(text="Загрузка модели распознавания..."))
+            try:
+                from faster_whisper import WhisperModel
+                self.whisper = WhisperModel(WHISPER_MODEL_SIZE, device="cpu", compute_type="int8")
+            except Exception as e:
+                # Повторно модель не загружаем, дальше работает Google Speech Recognition
+                self._whisper_failed = True
+                logger.warning(f"Не удалось загрузить модель faster-whisper: {e}")
+                self.root.after(0, lambda: self.stt_status.config(
+                    text="Модель недоступна, используется Google Speech Recognition"))
+
+        if self.whisper is None:
+            return self.recognizer.recognize_google(audio, language='ru-RU')
+
+        segments, _ = self.whisper.transcribe(io.BytesIO(audio.get_wav_data()), language="ru", beam_size=1)
+        text = ''.join(segment.text for segment in segments).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
     def reset_recording_ui(self):
         """Сброс UI записи"""
         self.recording = False
@@ -428,14 +765,16 @@ class VoiceChatBot:
         # В speech_recognition нет прямого способа прервать listen
         # Поэтому просто меняем флаг и ждем завершения потока
 
-    def update_stt_text(self, text):
-        """Обновление текста распознавания"""
-        self.stt_text.delete(1.0, tk.END)
-        self.stt_text.insert(1.0, text)
+    def append_stt_text(self, text):
+        """Добавление распознанной фразы к тексту"""
+        if self.stt_text.index('end-1c') != '1.0':
+            text = ' ' + text
+        self.stt_text.insert(tk.END, text)
+        self.stt_text.see(tk.END)
 
     def send_to_chat(self):
         """Отправка распознанного текста в чат"""
-        text = self.stt_text.get(1.0, tk.END).strip()
+        text = _widget_text(self.stt_text)
         if text:
             self.chat_input.delete(1.0, tk.END)
             self.chat_input.insert(1.0, text)
@@ -443,7 +782,11 @@ class VoiceChatBot:
 
     def send_message(self):
         """Отправка сообщения в чат"""
-        message = self.chat_input.get(1.0, tk.END).strip()
+        # Предыдущий ответ еще выводится в чат
+        if self._chat_busy:
+            return
+
+        message = _widget_text(self.chat_input)
         if not message:
             return
 
@@ -457,49 +800,50 @@ class VoiceChatBot:
         self.chat_input.delete(1.0, tk.END)
 
         # Отправка в API
+        self._chat_busy = True
+        self.send_btn.config(state='disabled')
         threading.Thread(target=self.get_chat_response, args=(message,), daemon=True).start()
 
     def get_chat_response(self, message):
         """Получение ответа от чат-бота"""
-        if not self.api_key:
-            return
+        import requests
 
         try:
+            if not self.api_key:
+                return
+
             self.root.after(0, self.update_status, "Получение ответа от AI...")
 
             # Используем OpenRouter API
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
+            # Ответ приходит потоком (SSE) и выводится по мере генерации
             data = {
                 "model": self.model,
                 "messages": [{"role": "user", "content": message}],
-                "temperature": 0.7
+                "temperature": 0.7,
+                "stream": True
             }
 
-            response = requests.post(
+            with self.get_http_session().post(
                 self.model_url,
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                reply = result['choices'][0]['message']['content']
+                data=_json_dumps(data),
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code == 200:
+                    if response.headers.get('Content-Type', '').startswith('application/json'):
+                        # Сервер ответил без потока: берем из JSON только текст ответа
+                        reply = _json_loads(response.content)['choices'][0]['message']['content']
+                        self.root.after(0, self.add_to_chat_history, "AI", reply)
+                    else:
+                        self.read_stream_reply(response)
+                    self.root.after(0, self.update_status, "Ответ получен")
 
-                # Добавление ответа в историю
-                self.root.after(0, self.add_to_chat_history, "AI", reply)
-                self.root.after(0, self.update_status, "Ответ получен")
-
-            else:
-                error_msg = f"Ошибка API: {response.status_code}"
-                if response.text:
-                    error_msg += f" - {response.text[:100]}"
-                self.root.after(0, self.add_to_chat_history, "Система", error_msg)
-                self.root.after(0, self.update_status, "Ошибка API")
+                else:
+                    error_msg = f"Ошибка API: {response.status_code}"
+                    if response.text:
+                        error_msg += f" - {response.text[:100]}"
+                    self.root.after(0, self.add_to_chat_history, "Система", error_msg)
+                    self.root.after(0, self.update_status, "Ошибка API")
 
         except requests.exceptions.Timeout:
             self.root.after(0, self.add_to_chat_history, "Система", "Таймаут запроса")
@@ -507,39 +851,105 @@ class VoiceChatBot:
         except Exception as e:
             self.root.after(0, self.add_to_chat_history, "Система", f"Ошибка: {str(e)}")
             self.root.after(0, self.update_status, "Ошибка")
+        finally:
+            # Выполнится после всех вставок ответа в чат (очередь after упорядочена)
+            self.root.after(0, self.finish_chat_request)
+
+    def finish_chat_request(self):
+        """Разрешение отправки следующего сообщения"""
+        self._chat_busy = False
+        self.send_btn.config(state='normal')
+
+    def read_stream_reply(self, response):
+        """
+        Чтение ответа в формате SSE с выводом фрагментов в чат по мере поступления
+
+        Args:
+            response: потоковый ответ API
+
+        Returns:
+            Полный текст ответа
+        """
+        parts = []
+        # Время ответа фиксируется один раз, фрагменты дописываются без заголовков
+        timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+        self.root.after(0, self.begin_chat_message, "AI", timestamp)
+
+        try:
+            for line in response.iter_lines():
+                # Пропускаем пустые строки и комментарии SSE
+                if not line.startswith(b'data: '):
+                    continue
+
+                payload = line[6:]
+                if payload == b'[DONE]':
+                    break
+
+                chunk = _json_loads(payload)
+                if 'error' in chunk:
+                    raise RuntimeError(f"Ошибка потока: {chunk['error']}")
+
+                # Служебные фрагменты (например, с usage) приходят без choices
+                choices = chunk.get('choices')
+                if not choices:
+                    continue
+
+                delta = choices[0].get('delta', {}).get('content')
+                if delta:
+                    parts.append(delta)
+                    self.root.after(0, self.append_chat_text, delta)
+        finally:
+            # Сохраняем в истории даже частично полученный ответ
+            self.root.after(0, self.finish_chat_message, "AI", ''.join(parts), timestamp)
+
+        return ''.join(parts)
 
     def add_to_chat_history(self, sender, message):
         """Добавление сообщения в историю чата"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-
-        # Форматирование сообщения
-        if sender == "Вы":
-            color = "#3498db"
-            bg_color = "#2c3e50"
-        elif sender == "AI":
-            color = "#2ecc71"
-            bg_color = "#34495e"
-        else:
-            color = "#e74c3c"
-            bg_color = "#2c3e50"
+        timestamp = self.begin_chat_message(sender)
+        self.append_chat_text(message)
+        self.finish_chat_message(sender, message, timestamp)
 
-        # Вставка сообщения
-        self.chat_history.config(state='normal')
+    def begin_chat_message(self, sender, timestamp=None):
+        """
+        Вставка заголовка сообщения в чат
+
+        Args:
+            sender: отправитель сообщения
+            timestamp: время сообщения (по умолчанию текущее)
+
+        Returns:
+            Время сообщения
+        """
+        if timestamp is None:
+            timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
 
         # Добавление разделителя если это не первое сообщение
-        if self.chat_history.get(1.0, tk.END).strip():
+        if self.chat_history.index('end-1c') != '1.0':
             self.chat_history.insert(tk.END, "\n" + "─" * 50 + "\n")
 
-        # Вставка сообщения
+        # Вставка заголовка
         self.chat_history.insert(tk.END, f"[{timestamp}] {sender}:\n", f"header_{sender}")
-        self.chat_history.insert(tk.END, f"{message}\n")
+        self.chat_history.see(tk.END)
 
-        # Настройка тегов для форматирования
-        self.chat_history.tag_config(f"header_{sender}", foreground=color, font=('Segoe UI', 10, 'bold'))
+        return timestamp
+
+    def append_chat_text(self, text):
+        """Добавление текста к последнему сообщению чата"""
+        self.chat_history.insert(tk.END, text)
+        self.chat_history.see(tk.END)
+
+    def finish_chat_message(self, sender, message, timestamp):
+        """Завершение сообщения в чате и сохранение его в истории"""
+        self.chat_history.insert(tk.END, "\n")
+
+        # Удаление старых строк, чтобы виджет не разрастался
+        line_count = int(self.chat_history.index('end-1c').split('.')[0])
+        if line_count > CHAT_WIDGET_MAX_LINES:
+            self.chat_history.delete('1.0', f'{CHAT_WIDGET_TRIM_LINES + 1}.0')
 
         # Прокрутка вниз
         self.chat_history.see(tk.END)
-        self.chat_history.config(state='disabled')
 
         # Сохранение в истории
         self.chat_history_data.append({
@@ -550,49 +960,168 @@ class VoiceChatBot:
 
     def play_tts(self):
         """Воспроизведение синтезированной речи"""
-        text = self.tts_text.get(1.0, tk.END).strip()
+        text = _widget_text(self.tts_text)
         if not text:
             messagebox.showwarning("Внимание", "Введите текст для озвучивания")
             return
 
+        # Предыдущий синтез еще не завершен
+        if self._tts_busy:
+            return
+
+        lang = self.voice_var.get()
+        slow = self.slow_var.get()
+        cache_path = self.get_tts_cache_path(text, lang, slow)
+
+        # Фраза уже в кэше - сразу воспроизводим
+        if cache_path.exists():
+            self.start_playback(cache_path)
+            return
+
+        # Синтез идет в отдельном потоке, чтобы не блокировать интерфейс
+        self._tts_busy = True
+        self.play_btn.config(state='disabled')
+        self.tts_status.config(text="Синтез речи...")
+        threading.Thread(
+            target=self._synth_worker,
+            args=(text, lang, slow, cache_path),
+            daemon=True
+        ).start()
+
+    def _synth_worker(self, text, lang, slow, cache_path):
+        """Синтез речи в фоновом потоке"""
         try:
-            self.tts_status.config(text="Синтез речи...")
+            self.synthesize_to_cache(text, lang, slow, cache_path)
+        except Exception as e:
+            self.root.after(0, self._finish_synthesis, None, f"Ошибка: {str(e)}")
+            return
 
-            # Используем gTTS для синтеза
-            tts = gTTS(
-                text=text,
-                lang=self.voice_var.get(),
-                slow=self.slow_var.get()
-            )
+        self.root.after(0, self._finish_synthesis, cache_path, None)
 
-            # Создание временного файла
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
-                tts.save(tmp_file.name)
-                temp_path = tmp_file.name
+    def _finish_synthesis(self, cache_path, error_text):
+        """Завершение синтеза (выполняется в потоке интерфейса)"""
+        self._tts_busy = False
+        self.play_btn.config(state='normal')
 
-            # Воспроизведение
-            pygame.mixer.music.load(temp_path)
-            pygame.mixer.music.set_volume(self.volume_var.get())
-            pygame.mixer.music.play()
+        if error_text:
+            self.tts_status.config(text=error_text)
+        else:
+            self.start_playback(cache_path)
 
-            self.tts_status.config(text="Воспроизведение...")
+    def start_playback(self, cache_path):
+        """Воспроизведение фразы из кэша"""
+        import pygame
 
-            # Ожидание завершения воспроизведения
-            def check_playback():
-                if pygame.mixer.music.get_busy():
-                    self.root.after(100, check_playback)
-                else:
-                    self.tts_status.config(text="Воспроизведение завершено")
-                    try:
-                        os.unlink(temp_path)
-                    except:
-                        pass
+        try:
+            self.init_playback()
+            self._stop_playback()
+            volume = self.volume_var.get()
+            if cache_path.stat().st_size <= SOUND_MAX_FILE_SIZE:
+                # Короткая фраза: декодируется один раз и играет из памяти
+                self._tts_channel = self._get_sound(cache_path).play()
+                self._tts_channel.set_volume(volume)
+                self._tts_channel.set_endevent(self.tts_end_event)
+            else:
+                # Длинный текст: потоковое воспроизведение
+                pygame.mixer.music.load(str(cache_path))
+                pygame.mixer.music.set_volume(volume)
+                pygame.mixer.music.play()
+
+            # Страховка от утечек буферов SDL в долгой сессии
+            self._playback_count += 1
+            if self._playback_count % GC_PLAYBACK_INTERVAL == 0:
+                gc.collect()
+
+            self.tts_status.config(text="Воспроизведение...")
 
-            self.root.after(100, check_playback)
+            # Ожидание события окончания воспроизведения
+            if self._playback_pump is None:
+                self._playback_pump = self.root.after(PLAYBACK_PUMP_INTERVAL, self._pump_pygame_events)
 
         except Exception as e:
             self.tts_status.config(text=f"Ошибка: {str(e)}")
 
+    def _pump_pygame_events(self):
+        """Проверка события окончания воспроизведения"""
+        import pygame
+
+        # Событие приходит и при остановке предыдущего файла, поэтому проверяем,
+        # что воспроизведение действительно закончилось
+        if pygame.event.get(self.tts_end_event) and not self._is_playing():
+            self._playback_pump = None
+            # Освобождаем буферы SDL от проигранного файла
+            pygame.mixer.music.unload()
+            self.tts_status.config(text="Воспроизведение завершено")
+            return
+
+        self._playback_pump = self.root.after(PLAYBACK_PUMP_INTERVAL, self._pump_pygame_events)
+
+    def _is_playing(self):
+        """Идет ли сейчас воспроизведение"""
+        import pygame
+
+        if self._tts_channel is not None and self._tts_channel.get_busy():
+            return True
+        return pygame.mixer.music.get_busy()
+
+    def _stop_playback(self):
+        """Остановка текущего воспроизведения"""
+        import pygame
+
+        if self._tts_channel is not None:
+            self._tts_channel.stop()
+            self._tts_channel = None
+        # Перед загрузкой нового файла освобождаем буферы SDL от предыдущего
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+
+    def _get_sound(self, cache_path):
+        """Декодированная фраза из кэша в памяти (LRU)"""
+        import pygame
+
+        key = cache_path.stem
+        sound = self._sound_cache.get(key)
+        if sound is not None:
+            self._sound_cache.move_to_end(key)
+            return sound
+
+        sound = pygame.mixer.Sound(str(cache_path))
+        self._sound_cache[key] = sound
+        if len(self._sound_cache) > SOUND_CACHE_MAX:
+            self._sound_cache.popitem(last=False)
+        return sound
+
+    def get_tts_cache_path(self, text, lang, slow):
+        """Путь к файлу кэша для фразы с заданными параметрами синтеза"""
+        key = hashlib.sha1(f"{text}|{lang}|{slow}".encode('utf-8')).hexdigest()
+        return self.tts_cache_dir / f"{key}.mp3"
+
+    def synthesize_to_cache(self, text, lang, slow, cache_path):
+        """Синтез речи через gTTS с сохранением в кэш"""
+        from gtts import gTTS
+
+        tts = gTTS(text=text, lang=lang, slow=slow)
+        # Пишем во временный файл, чтобы в кэш не попал недокачанный mp3
+        part_path = cache_path.with_name(f"{cache_path.stem}.{threading.get_ident()}.part")
+        try:
+            tts.save(str(part_path))
+            part_path.replace(cache_path)
+        except Exception:
+            # Не оставляем в кэше недокачанный файл
+            part_path.unlink(missing_ok=True)
+            raise
+
+    def _preload_tts(self):
+        """Предварительный синтез фиксированных и пользовательских фраз"""
+        phrases = FIXED_PHRASES + list(self.settings.get('preload_phrases', []))
+        for phrase in phrases:
+            cache_path = self.get_tts_cache_path(phrase, 'ru', False)
+            if cache_path.exists():
+                continue
+            try:
+                self.synthesize_to_cache(phrase, 'ru', False, cache_path)
+            except Exception as e:
+                logger.warning(f"Не удалось подготовить фразу '{phrase}': {e}")
 
     def speak_last_response(self):
         """Озвучивание последнего ответа AI"""
@@ -628,7 +1157,13 @@ class VoiceChatBot:
     def on_closing(self):
         """Обработка закрытия окна"""
         self.recording = False
-        pygame.mixer.quit()
+        if self.mic_source is not None:
+            self.microphone.__exit__(None, None, None)
+        if self.http is not None:
+            self.http.close()
+        if self._audio_inited:
+            import pygame
+            pygame.mixer.quit()
         self.root.destroy()
 
 